@@ -23,10 +23,14 @@ DB_URL = "https://wattcarbon-sandbox-resstock.s3.amazonaws.com/resstock.db"
 def download_db():
     if not os.path.exists(DB_LOCAL_PATH):
         with st.spinner("Downloading database..."):
-            r = requests.get(DB_URL)
-            r.raise_for_status()
-            with open(DB_LOCAL_PATH, "wb") as f:
-                f.write(r.content)
+            # Stream to a temporary file so a failed download never leaves a partial database
+            part_path = f"{DB_LOCAL_PATH}.part"
+            with requests.get(DB_URL, stream=True) as r:
+                r.raise_for_status()
+                with open(part_path, "wb") as f:
+                    for chunk in r.iter_content(chunk_size=1024 * 1024):
+                        f.write(chunk)
+            os.replace(part_path, DB_LOCAL_PATH)
     return DB_LOCAL_PATH
 
 db_path = download_db()
@@ -4,7 +4,10 @@ Script to convert ResStock parquet file to SQLite database with county and build
 This creates aggregated data for visualizations without storing raw building data.
 """
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import sqlite3
 import os
 import requests
@@ -28,6 +31,79 @@ distribution_columns = [
     # 'in_appliance_type',
 ]
 
+# Columns read from the parquet file for the county summaries (cleaned names)
+summary_columns = [
+    'in_county',
+    'in_county_name',
+    'in_state',
+    'in_geometry_building_type_recs',
+    'weight',
+    'in_geometry_floor_area',
+    'in_vintage',
+    'in_heating_fuel',
+    'in_water_heater_fuel',
+    'out_electricity_total_energy_consumption',
+    'out_bills_electricity_usd',
+    'out_energy_burden_percentage',
+] + distribution_columns
+
+# Averaged columns in the summaries: output column -> source column
+average_columns = {
+    'avg_floor_area': 'in_geometry_floor_area',
+    'avg_vintage': 'in_vintage',
+    'avg_electricity_kwh': 'out_electricity_total_energy_consumption',
+    'avg_electric_bill': 'out_bills_electricity_usd',
+    'avg_energy_burden': 'out_energy_burden_percentage',
+}
+
+# Columns read from the parquet file for the building lookup (cleaned names)
+building_lookup_columns = ['bldg_id', 'in_state', 'in_geometry_building_type_recs', 'in_county']
+
+def load_parquet_columns(parquet_file, columns):
+    """
+    Load only the requested columns from the parquet file
+
+    Column names are matched after replacing periods with underscores, so callers
+    use the SQLite-compatible names. Unknown columns are skipped. String columns are
+    read dictionary-encoded and come back as categoricals with sorted categories.
+
+    Args:
+        parquet_file (str): Path to the parquet file
+        columns (list): Cleaned column names to load
+    """
+    wanted = set(columns)
+    schema = pq.read_schema(parquet_file)
+    parquet_columns = [name for name in schema.names if name.replace('.', '_') in wanted]
+    string_columns = [
+        name for name in parquet_columns
+        if pa.types.is_string(schema.field(name).type) or pa.types.is_large_string(schema.field(name).type)
+    ]
+    df = pd.read_parquet(parquet_file, columns=parquet_columns, read_dictionary=string_columns)
+
+    # Sort categories so grouped output and tie-breaking follow value order
+    for col in df.select_dtypes('category').columns:
+        df[col] = df[col].cat.reorder_categories(sorted(df[col].cat.categories))
+
+    # Reset index to make bldg_id a regular column
+    df = df.reset_index()
+
+    # Replace periods with underscores in column names for SQLite compatibility
+    df.columns = df.columns.str.replace('.', '_')
+
+    if 'bldg_id' in df.columns:
+        df['bldg_id'] = df['bldg_id'].astype('int32')
+
+    return df
+
+def add_numeric_columns(df):
+    """
+    Add a '<col>_numeric' copy of each averaged column, coerced to numbers
+    """
+    for col in average_columns.values():
+        if col in df.columns:
+            df[f'{col}_numeric'] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
 def convert_parquet_to_sqlite(parquet_file='baseline.parquet', db_file='resstock.db'):
     """
     Convert parquet file to SQLite database with county and building type summaries
@@ -46,17 +122,12 @@ def convert_parquet_to_sqlite(parquet_file='baseline.parquet', db_file='resstock
     try:
         # Load parquet file
         print("📖 Loading parquet file...")
-        df = pd.read_parquet(parquet_file)
-        
-        # Reset index to make bldg_id a regular column
-        df = df.reset_index()
-        
-        # Replace periods with underscores in column names for SQLite compatibility
-        print("🔄 Cleaning column names...")
-        df.columns = df.columns.str.replace('.', '_')
+        df = load_parquet_columns(parquet_file, summary_columns)
         
         print(f"✅ Loaded {len(df):,} rows with {len(df.columns)} columns")
         
+        df = add_numeric_columns(df)
+        
         # Create county summary (for backward compatibility)
         print("📊 Creating county-level summaries...")
         county_summary = create_county_summary(df)
@@ -144,138 +215,81 @@ def convert_parquet_to_sqlite(parquet_file='baseline.parquet', db_file='resstock
         traceback.print_exc()
         return False
 
-def create_county_summary(df):
+def group_value_matrix(df, group_cols, col):
     """
-    Create county-level summary with essential aggregated data
+    Count each value of col within every group as a (groups x values) matrix
+
+    Value columns are in sorted order, so the first maximum in a row matches Series.mode().
     """
-    print("📋 Creating county summary...")
-    
-    # Group by county and create summary
-    county_groups = df.groupby(['in_county', 'in_county_name', 'in_state'])
+    return df.groupby(group_cols + [col], observed=True).size().unstack(col, fill_value=0)
+
+def summarize_groups(df, group_cols, most_common_columns):
+    """
+    Aggregate counts, averages, most common values and distributions for each group
     
-    summary_data = []
+    All statistics are computed with whole-frame groupby operations rather than a
+    Python loop over the groups.
     
-    # Create progress bar
-    pbar = tqdm(county_groups, desc="Processing counties", unit="county")
-    
-    for (county_id, county_name, state), group in pbar:
-        state_fips = county_id[1:3]     # '01'
-        county_fips = county_id[4:7]    # '000'
-        fips = f'0500000US{state_fips}{county_fips}'
-        
-        # Update progress bar description with current county
-        pbar.set_description(f"Processing {county_name}, {state}")
-        pbar.set_postfix(buildings=len(group))
-        
-        # Basic counts and averages
-        building_count = len(group)
-        weighted_count = group['weight'].sum() if 'weight' in group.columns else building_count
-        
-        # Building characteristics
-        avg_floor_area = None
-        if 'in_geometry_floor_area' in group.columns:
-            try:
-                avg_floor_area = pd.to_numeric(group['in_geometry_floor_area'], errors='coerce').mean()
-            except:
-                avg_floor_area = None
-                
-        avg_vintage = None
-        if 'in_vintage' in group.columns:
-            try:
-                avg_vintage = pd.to_numeric(group['in_vintage'], errors='coerce').mean()
-            except:
-                avg_vintage = None
-        
-        # Energy metrics
-        avg_electricity_kwh = None
-        if 'out_electricity_total_energy_consumption' in group.columns:
-            try:
-                avg_electricity_kwh = pd.to_numeric(group['out_electricity_total_energy_consumption'], errors='coerce').mean()
-            except:
-                avg_electricity_kwh = None
-                
-        avg_electric_bill = None
-        if 'out_bills_electricity_usd' in group.columns:
-            try:
-                avg_electric_bill = pd.to_numeric(group['out_bills_electricity_usd'], errors='coerce').mean()
-            except:
-                avg_electric_bill = None
-                
-        avg_energy_burden = None
-        if 'out_energy_burden_percentage' in group.columns:
-            try:
-                avg_energy_burden = pd.to_numeric(group['out_energy_burden_percentage'], errors='coerce').mean()
-            except:
-                avg_energy_burden = None
-        
-        
-        
-        # Generate distribution data for all configured columns
-        distribution_data = {}
-        
-        for col in distribution_columns:
-            if col in group.columns:
-                try:
-                    value_counts = group[col].value_counts()
-                    distribution_data[f"{col}_dist"] = ','.join([f"{k}:{v}" for k, v in value_counts.items()])
-                except Exception as e:
-                    distribution_data[f"{col}_dist"] = None
-            else:
-                distribution_data[f"{col}_dist"] = None
-        
-        # Most common values (for quick reference)
-        most_common_building_type = None
-        if 'in_geometry_building_type_recs' in group.columns:
-            try:
-                most_common_building_type = group['in_geometry_building_type_recs'].mode().iloc[0] if len(group['in_geometry_building_type_recs'].mode()) > 0 else None
-            except:
-                most_common_building_type = None
-        
-        most_common_heating_fuel = None
-        if 'in_heating_fuel' in group.columns:
-            try:
-                most_common_heating_fuel = group['in_heating_fuel'].mode().iloc[0] if len(group['in_heating_fuel'].mode()) > 0 else None
-            except:
-                most_common_heating_fuel = None
-        
-        most_common_water_heater_fuel = None
-        if 'in_water_heater_fuel' in group.columns:
-            try:
-                most_common_water_heater_fuel = group['in_water_heater_fuel'].mode().iloc[0] if len(group['in_water_heater_fuel'].mode()) > 0 else None
-            except:
-                most_common_water_heater_fuel = None
-        
-        # Create summary row
-        summary_row = {
-            'in_county': county_id,
-            'fips': fips,
-            'in_county_name': county_name,
-            'in_state': state,
-            'building_count': building_count,
-            'weighted_count': weighted_count,
-            'avg_floor_area': avg_floor_area,
-            'avg_vintage': avg_vintage,
-            'avg_electricity_kwh': avg_electricity_kwh,
-            'avg_electric_bill': avg_electric_bill,
-            'avg_energy_burden': avg_energy_burden,
-            'most_common_building_type': most_common_building_type,
-            'most_common_heating_fuel': most_common_heating_fuel,
-            'most_common_water_heater_fuel': most_common_water_heater_fuel
-        }
-        
-        # Add all distribution data to summary row
-        summary_row.update(distribution_data)
-        
-        summary_data.append(summary_row)
-    
-    # Create DataFrame
-    summary_df = pd.DataFrame(summary_data)
+    Args:
+        df (DataFrame): Building data with numeric columns added by add_numeric_columns
+        group_cols (list): Columns to group by, starting with in_county
+        most_common_columns (dict): Output column -> source column for most common values
+    """
+    grouped = df.groupby(group_cols, observed=True)
     
-    print(f"✅ Created summary for {len(summary_df)} counties")
+    # Basic counts and averages
+    summary = grouped.size().rename('building_count').to_frame()
+    if 'weight' in df.columns:
+        summary['weighted_count'] = grouped['weight'].sum()
+    else:
+        summary['weighted_count'] = summary['building_count']
+    
+    for avg_col, col in average_columns.items():
+        numeric_col = f'{col}_numeric'
+        summary[avg_col] = grouped[numeric_col].mean() if numeric_col in df.columns else None
+    
+    # Value count matrices are shared between most common values and distributions
+    value_matrices = {}
+    for col in set(most_common_columns.values()) | set(distribution_columns):
+        if col in df.columns:
+            value_matrices[col] = group_value_matrix(df, group_cols, col)
+    
+    # Most common values (for quick reference)
+    for most_common_col, col in most_common_columns.items():
+        if col in value_matrices:
+            matrix = value_matrices[col]
+            top_values = matrix.columns.to_numpy()[matrix.to_numpy().argmax(axis=1)]
+            summary[most_common_col] = pd.Series(top_values, index=matrix.index)
+        else:
+            summary[most_common_col] = None
+    
+    # Distribution data for all configured columns ("value:count,value:count")
+    for col in distribution_columns:
+        if col in value_matrices:
+            matrix = value_matrices[col]
+            labels = matrix.columns.astype(str).tolist()
+            counts = matrix.to_numpy()
+            # Most frequent first, ties in value order
+            order = np.argsort(-counts, axis=1, kind='stable')
+            dist = [
+                ','.join(f"{labels[j]}:{row[j]}" for j in row_order if row[j])
+                for row, row_order in zip(counts.tolist(), order.tolist())
+            ]
+            summary[f"{col}_dist"] = pd.Series(dist, index=matrix.index)
+        else:
+            summary[f"{col}_dist"] = None
+    
+    summary = summary.reset_index()
+    county_id = summary['in_county'].astype(str)
+    summary.insert(1, 'fips', '0500000US' + county_id.str[1:3] + county_id.str[4:7])
+    
+    return summary
+
+def print_summary_columns(summary_df, basic_cols):
+    """Print the summary table columns grouped by type"""
     print(f"📊 Summary table columns ({len(summary_df.columns)} total):")
     
     # Group columns by type for better readability
-    basic_cols = ['in_county', 'in_county_name', 'in_state', 'building_count', 'weighted_count']
     avg_cols = [col for col in summary_df.columns if col.startswith('avg_')]
     most_common_cols = [col for col in summary_df.columns if col.startswith('most_common_')]
     dist_cols = [col for col in summary_df.columns if col.endswith('_dist')]
@@ -284,6 +298,25 @@ def create_county_summary(df):
     print(f"   📊 Average columns ({len(avg_cols)}): {', '.join(avg_cols)}")
     print(f"   🏆 Most common columns ({len(most_common_cols)}): {', '.join(most_common_cols)}")
     print(f"   📈 Distribution columns ({len(dist_cols)}): {', '.join(dist_cols)}")
+
+def create_county_summary(df):
+    """
+    Create county-level summary with essential aggregated data
+    """
+    print("📋 Creating county summary...")
+    
+    summary_df = summarize_groups(
+        df,
+        ['in_county', 'in_county_name', 'in_state'],
+        {
+            'most_common_building_type': 'in_geometry_building_type_recs',
+            'most_common_heating_fuel': 'in_heating_fuel',
+            'most_common_water_heater_fuel': 'in_water_heater_fuel',
+        },
+    )
+    
+    print(f"✅ Created summary for {len(summary_df)} counties")
+    print_summary_columns(summary_df, ['in_county', 'in_county_name', 'in_state', 'building_count', 'weighted_count'])
     
     return summary_df
 
@@ -293,131 +326,17 @@ def create_county_building_summary(df):
     """
     print("📋 Creating county and building type summary...")
     
-    # Group by county and building type
-    county_building_groups = df.groupby(['in_county', 'in_county_name', 'in_state', 'in_geometry_building_type_recs'])
-    
-    summary_data = []
-    
-    # Create progress bar
-    pbar = tqdm(county_building_groups, desc="Processing county-building combinations", unit="combination")
-    
-    for (county_id, county_name, state, building_type), group in pbar:
-        state_fips = county_id[1:3]     # '01'
-        county_fips = county_id[4:7]    # '000'
-        fips = f'0500000US{state_fips}{county_fips}'
-        
-        # Update progress bar description with current county and building type
-        pbar.set_description(f"Processing {county_name}, {state} - {building_type}")
-        pbar.set_postfix(buildings=len(group))
-        
-        # Basic counts and averages
-        building_count = len(group)
-        weighted_count = group['weight'].sum() if 'weight' in group.columns else building_count
-        
-        # Building characteristics
-        avg_floor_area = None
-        if 'in_geometry_floor_area' in group.columns:
-            try:
-                avg_floor_area = pd.to_numeric(group['in_geometry_floor_area'], errors='coerce').mean()
-            except:
-                avg_floor_area = None
-                
-        avg_vintage = None
-        if 'in_vintage' in group.columns:
-            try:
-                avg_vintage = pd.to_numeric(group['in_vintage'], errors='coerce').mean()
-            except:
-                avg_vintage = None
-        
-        # Energy metrics
-        avg_electricity_kwh = None
-        if 'out_electricity_total_energy_consumption' in group.columns:
-            try:
-                avg_electricity_kwh = pd.to_numeric(group['out_electricity_total_energy_consumption'], errors='coerce').mean()
-            except:
-                avg_electricity_kwh = None
-                
-        avg_electric_bill = None
-        if 'out_bills_electricity_usd' in group.columns:
-            try:
-                avg_electric_bill = pd.to_numeric(group['out_bills_electricity_usd'], errors='coerce').mean()
-            except:
-                avg_electric_bill = None
-                
-        avg_energy_burden = None
-        if 'out_energy_burden_percentage' in group.columns:
-            try:
-                avg_energy_burden = pd.to_numeric(group['out_energy_burden_percentage'], errors='coerce').mean()
-            except:
-                avg_energy_burden = None
-        
-        # Generate distribution data for all configured columns
-        distribution_data = {}
-        
-        for col in distribution_columns:
-            if col in group.columns:
-                try:
-                    value_counts = group[col].value_counts()
-                    distribution_data[f"{col}_dist"] = ','.join([f"{k}:{v}" for k, v in value_counts.items()])
-                except Exception as e:
-                    distribution_data[f"{col}_dist"] = None
-            else:
-                distribution_data[f"{col}_dist"] = None
-        
-        # Most common values (for quick reference)
-        most_common_heating_fuel = None
-        if 'in_heating_fuel' in group.columns:
-            try:
-                most_common_heating_fuel = group['in_heating_fuel'].mode().iloc[0] if len(group['in_heating_fuel'].mode()) > 0 else None
-            except:
-                most_common_heating_fuel = None
-        
-        most_common_water_heater_fuel = None
-        if 'in_water_heater_fuel' in group.columns:
-            try:
-                most_common_water_heater_fuel = group['in_water_heater_fuel'].mode().iloc[0] if len(group['in_water_heater_fuel'].mode()) > 0 else None
-            except:
-                most_common_water_heater_fuel = None
-        
-        # Create summary row
-        summary_row = {
-            'in_county': county_id,
-            'fips': fips,
-            'in_county_name': county_name,
-            'in_state': state,
-            'in_geometry_building_type_recs': building_type,
-            'building_count': building_count,
-            'weighted_count': weighted_count,
-            'avg_floor_area': avg_floor_area,
-            'avg_vintage': avg_vintage,
-            'avg_electricity_kwh': avg_electricity_kwh,
-            'avg_electric_bill': avg_electric_bill,
-            'avg_energy_burden': avg_energy_burden,
-            'most_common_heating_fuel': most_common_heating_fuel,
-            'most_common_water_heater_fuel': most_common_water_heater_fuel
-        }
-        
-        # Add all distribution data to summary row
-        summary_row.update(distribution_data)
-        
-        summary_data.append(summary_row)
-    
-    # Create DataFrame
-    summary_df = pd.DataFrame(summary_data)
+    summary_df = summarize_groups(
+        df,
+        ['in_county', 'in_county_name', 'in_state', 'in_geometry_building_type_recs'],
+        {
+            'most_common_heating_fuel': 'in_heating_fuel',
+            'most_common_water_heater_fuel': 'in_water_heater_fuel',
+        },
+    )
     
     print(f"✅ Created summary for {len(summary_df)} county-building type combinations")
-    print(f"📊 Summary table columns ({len(summary_df.columns)} total):")
-    
-    # Group columns by type for better readability
-    basic_cols = ['in_county', 'in_county_name', 'in_state', 'in_geometry_building_type_recs', 'building_count', 'weighted_count']
-    avg_cols = [col for col in summary_df.columns if col.startswith('avg_')]
-    most_common_cols = [col for col in summary_df.columns if col.startswith('most_common_')]
-    dist_cols = [col for col in summary_df.columns if col.endswith('_dist')]
-    
-    print(f"   📍 Basic columns ({len(basic_cols)}): {', '.join(basic_cols)}")
-    print(f"   📊 Average columns ({len(avg_cols)}): {', '.join(avg_cols)}")
-    print(f"   🏆 Most common columns ({len(most_common_cols)}): {', '.join(most_common_cols)}")
-    print(f"   📈 Distribution columns ({len(dist_cols)}): {', '.join(dist_cols)}")
+    print_summary_columns(summary_df, ['in_county', 'in_county_name', 'in_state', 'in_geometry_building_type_recs', 'building_count', 'weighted_count'])
     
     return summary_df
 
@@ -653,22 +572,12 @@ def create_building_lookup(parquet_file='baseline.parquet', db_file='resstock_bu
     try:
         # Load parquet file
         print("📖 Loading parquet file...")
-        df = pd.read_parquet(parquet_file)
-        
-        # Reset index to make bldg_id a regular column
-        df = df.reset_index()
-        
-        # Replace periods with underscores in column names for SQLite compatibility
-        print("🔄 Cleaning column names...")
-        df.columns = df.columns.str.replace('.', '_')
+        df = load_parquet_columns(parquet_file, building_lookup_columns)
         
         print(f"✅ Loaded {len(df):,} rows")
         
-        # Extract only the columns we need
-        # Check which columns exist and add them
-        
         # Create lookup dataframe
-        building_lookup = df[['bldg_id', 'in_state', 'in_geometry_building_type_recs', 'in_county']].copy()
+        building_lookup = df[building_lookup_columns]
         
         # Rename columns to simpler names
         rename_map = {"bldg_id": "bldg_id", "in_state": "state", "in_geometry_building_type_recs": "building_type", "in_county": "county"}
@@ -100,33 +100,44 @@ def create_and_fit_hourly_model(
     prediction = model.model.predict(temperature_data.index, temperature_data)
     meter_data = meter_data.merge(prediction.result, left_index=True, right_index=True)
     meter_data = meter_data.dropna()
-    meter_data["resid"] = meter_data["value"] - meter_data["predicted_usage"]
+    observed = meter_data["value"].to_numpy()
+    resid = observed - meter_data["predicted_usage"].to_numpy()
+    sq_resid = resid * resid
 
     # get uncertainty variables
-    model._autocorr_unc_vars = {}
     if list(model.model_metrics.keys()) == ["all"]:
-        model._autocorr_unc_vars["all"] = {
-            "mean_baseline_usage": np.mean(meter_data["value"]),
-            "n": model.model_metrics["all"].observed_length,
-            "n_prime": model.model_metrics["all"].n_prime,
-            "MSE": np.mean(meter_data["resid"] ** 2),
+        model._autocorr_unc_vars = {
+            "all": {
+                "mean_baseline_usage": float(np.mean(observed)),
+                "n": model.model_metrics["all"].observed_length,
+                "n_prime": model.model_metrics["all"].n_prime,
+                "MSE": float(np.mean(sq_resid)),
+            }
         }
     else:
         # monthly segment model
         model_month_dict = {
-            k.replace("-weighted", "").split("-")[1]: k for k in model.model_metrics
+            month_dict[k.replace("-weighted", "").split("-")[1]]: k
+            for k in model.model_metrics
         }
-        meter_data["month"] = meter_data.index.month
-
-        for month_abbr, model_key in model_month_dict.items():
-            month_n = month_dict[month_abbr]
-            month_data = meter_data[meter_data["month"] == month_n]
 
-            model._autocorr_unc_vars[month_n] = {
-                "mean_baseline_usage": np.mean(month_data["value"]),
+        # per-month sums in a single pass instead of one boolean mask per month
+        month = meter_data.index.month.to_numpy()
+        month_count = np.bincount(month, minlength=13)
+        month_usage = np.bincount(month, weights=observed, minlength=13)
+        month_sq_resid = np.bincount(month, weights=sq_resid, minlength=13)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            month_mean_usage = month_usage / month_count
+            month_mse = month_sq_resid / month_count
+
+        model._autocorr_unc_vars = {
+            month_n: {
+                "mean_baseline_usage": float(month_mean_usage[month_n]),
                 "n": model.model_metrics[model_key].observed_length,
                 "n_prime": model.model_metrics[model_key].n_prime,
-                "MSE": np.mean(month_data["resid"] ** 2),
+                "MSE": float(month_mse[month_n]),
             }
+            for month_n, model_key in model_month_dict.items()
+        }
 
     return model
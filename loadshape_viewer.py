@@ -1,36 +1,83 @@
 #!/usr/bin/env python3
-from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
 from eemeter.eemeter import HourlyBaselineData
 from eemeter.eemeter import HourlyReportingData
 
-import ciso8601
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+import numpy as np
 import pandas as pd
 import sqlite3
 import plotly.graph_objects as go
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.feather as feather
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
 import json
 import os
 import requests
+from requests.adapters import HTTPAdapter
 import random
-from io import BytesIO, StringIO
 
 from hourly import create_and_fit_hourly_model
 
 DB_LOCAL_PATH = "resstock_building_lookup.db"
 DB_URL = "https://wattcarbon-sandbox-resstock.s3.amazonaws.com/resstock_building_lookup.db"
+CACHE_DB_PATH = "cache.db"
+HOURS_24 = np.arange(24, dtype=np.int8)
+HOURS_24.setflags(write=False)
+DATA_SOURCE_MD = (
+    "**Data Source:**\n"
+    "- NREL ResStock 2018 Release 1.1\n"
+    "- Individual building loadshapes\n"
+    "- Fetched from S3 parquet files\n"
+    "- Total electricity consumption"
+)
+
+@st.cache_resource
+def get_http_session():
+    """Get an HTTP session that keeps connections to S3 alive across requests and sessions"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=3)
+    session.mount("https://", adapter)
+    return session
 
 @st.cache_data
 def download_db():
     if not os.path.exists(DB_LOCAL_PATH):
         with st.spinner("Downloading database..."):
-            r = requests.get(DB_URL)
-            r.raise_for_status()
-            with open(DB_LOCAL_PATH, "wb") as f:
-                f.write(r.content)
+            # Stream to a temporary file so a failed download never leaves a partial database
+            part_path = f"{DB_LOCAL_PATH}.part"
+            with get_http_session().get(DB_URL, stream=True) as r:
+                r.raise_for_status()
+                with open(part_path, "wb") as f:
+                    for chunk in r.iter_content(chunk_size=1024 * 1024):
+                        f.write(chunk)
+            os.replace(part_path, DB_LOCAL_PATH)
     return DB_LOCAL_PATH
 
 db_path = download_db()
 
+@st.cache_resource
+def create_cache_db():
+    """Create the on-disk cache of downloaded loadshape and weather data"""
+    conn = sqlite3.connect(CACHE_DB_PATH)
+    conn.execute("CREATE TABLE IF NOT EXISTS loadshape_cache (key TEXT PRIMARY KEY, data BLOB)")
+    conn.execute("CREATE TABLE IF NOT EXISTS weather_cache (key TEXT PRIMARY KEY, data BLOB)")
+    conn.commit()
+    conn.close()
+    return CACHE_DB_PATH
+
+cache_db_path = create_cache_db()
+
+@st.cache_resource
+def get_db_connection():
+    """Get the building lookup database connection shared by all queries and sessions"""
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.execute("PRAGMA cache_size = -64000")
+    return conn
+
 # Set page config
 st.set_page_config(
     page_title="ResStock Demand Response Evaluation",
@@ -43,7 +90,7 @@ st.set_page_config(
 st.title("📊 ResStock Demand Response Evaluation")
 st.markdown("View random loadshapes from NREL ResStock by selecting a state, upgrade, and building type")
 
-@st.cache_data
+@st.cache_resource
 def load_upgrades_lookup():
     """Load upgrades lookup from JSON file"""
     try:
@@ -57,50 +104,33 @@ def load_upgrades_lookup():
         return {}
 
 @st.cache_data
-def get_available_states():
-    """Get list of available states from building_lookup table"""
+def get_lookup_dimensions():
+    """Get lists of available states and building types from building_lookup table in one scan"""
     try:
-        conn = sqlite3.connect(db_path)
-        query = "SELECT DISTINCT state FROM building_lookup ORDER BY state"
-        states = pd.read_sql_query(query, conn)
-        conn.close()
-        return states['state'].tolist()
+        conn = get_db_connection()
+        query = "SELECT state, building_type FROM building_lookup GROUP BY state, building_type"
+        combinations = pd.read_sql_query(query, conn)
+        return sorted(combinations['state'].unique()), sorted(combinations['building_type'].unique())
     except Exception as e:
-        st.error(f"❌ Error fetching available states: {e}")
-        return []
-
-@st.cache_data
-def get_available_building_types():
-    """Get list of available building types from building_lookup table"""
-    try:
-        conn = sqlite3.connect(db_path)
-        query = "SELECT DISTINCT building_type FROM building_lookup ORDER BY building_type"
-        building_types = pd.read_sql_query(query, conn)
-        conn.close()
-        return building_types['building_type'].tolist()
-    except Exception as e:
-        st.error(f"❌ Error fetching available building types: {e}")
-        return []
+        st.error(f"❌ Error fetching available states and building types: {e}")
+        return [], []
 
 def get_random_building_id(state, building_type):
     """Get a random building ID from building_lookup table matching state and building type"""
-    conn = sqlite3.connect(db_path)
-    query = """
-    SELECT bldg_id 
-    FROM building_lookup 
-    WHERE state = ? AND building_type = ?
-    ORDER BY RANDOM()
-    LIMIT 1
-    """
-    result = pd.read_sql_query(query, conn, params=[state, building_type])
-    conn.close()
+    conn = get_db_connection()
+    where = "WHERE state = ? AND building_type = ?"
+    count = conn.execute(f"SELECT COUNT(*) FROM building_lookup {where}", [state, building_type]).fetchone()[0]
     
-    if len(result) == 0:
+    if count == 0:
         raise Exception(f"No building ID found for {state} - {building_type}")
-    return result['bldg_id'].iloc[0].astype(str)
+    
+    # Pick a random row by offset rather than sorting every match with ORDER BY RANDOM()
+    query = f"SELECT bldg_id FROM building_lookup {where} LIMIT 1 OFFSET ?"
+    bldg_id = conn.execute(query, [state, building_type, random.randrange(count)]).fetchone()[0]
+    return str(bldg_id)
 
 def get_building_info(building_id):
-    conn = sqlite3.connect(db_path)
+    conn = get_db_connection()
     # First get county ID from building_lookup
     query1 = """
     SELECT state, building_type, county 
@@ -111,34 +141,77 @@ def get_building_info(building_id):
     result = pd.read_sql_query(query1, conn, params=[building_id])
     
     if len(result) == 0:
-        conn.close()
         raise Exception(f"Building ID {building_id} not found in database")
     
     state = result['state'].iloc[0]
     building_type = result['building_type'].iloc[0]
     county_id = result['county'].iloc[0]
-    
-    conn.close()
     return state, building_type, county_id
 
-@st.cache_data
+def read_cache(table, key):
+    """Get a cached Arrow table from the cache database, or None if it is not cached"""
+    conn = sqlite3.connect(cache_db_path)
+    row = conn.execute(f"SELECT data FROM {table} WHERE key = ?", [key]).fetchone()
+    conn.close()
+    if row is None:
+        return None
+    return feather.read_table(pa.BufferReader(row[0]))
+
+def write_cache(table, key, arrow_table):
+    """Store an Arrow table in the cache database as feather bytes"""
+    sink = pa.BufferOutputStream()
+    feather.write_feather(arrow_table, sink)
+    conn = sqlite3.connect(cache_db_path)
+    conn.execute(f"INSERT OR REPLACE INTO {table} (key, data) VALUES (?, ?)", [key, sink.getvalue().to_pybytes()])
+    conn.commit()
+    conn.close()
+
+@st.cache_resource
+def get_fetched_weather_keys():
+    """Get the set of (state, county_id) pairs whose weather is already in the data cache"""
+    return set()
+
+# Fetched from a worker thread, so it must not write a spinner to the page
+@st.cache_data(show_spinner=False)
 def get_weather_data(state, county_id) -> pd.Series:
+    # Weather is cached on disk, so later sessions skip the download and CSV parsing
+    cache_key = f"{state}_{county_id}"
+    cached = read_cache("weather_cache", cache_key)
+    if cached is not None:
+        date_time, temperature = cached.columns
+        index = pd.DatetimeIndex(date_time.to_pandas(), name="date_time")
+        return pd.Series(temperature.to_numpy(), index=index, name=cached.column_names[1])
+    
     base_url = "https://oedi-data-lake.s3.amazonaws.com/nrel-pds-building-stock/end-use-load-profiles-for-us-building-stock"
     suffix = f"2024/resstock_amy2018_release_2/weather/state={state}/{county_id}_2018.csv"
     url = f"{base_url}/{suffix}"
     
     # Fetch CSV file
-    response = requests.get(url, timeout=30)
+    response = get_http_session().get(url, timeout=30)
     response.raise_for_status()
     
-    # Read CSV from response
-    df = pd.read_csv(StringIO(response.text))
-    resstock_series = df.set_index("date_time")["Dry Bulb Temperature [Â°C]"]
-    resstock_series.index = resstock_series.index.map(ciso8601.parse_datetime) - pd.Timedelta(
-        hours=1
+    # Read CSV straight from the response bytes with Arrow's multithreaded reader, parsing
+    # only the two columns we use
+    temperature_col = "Dry Bulb Temperature [°C]"
+    table = pacsv.read_csv(
+        pa.BufferReader(response.content),
+        convert_options=pacsv.ConvertOptions(
+            column_types={"date_time": pa.string()},
+            include_columns=["date_time", temperature_col],
+        ),
     )
-    resstock_series = resstock_series.resample("h").mean().copy()
+    # Build the series straight from the two Arrow columns, without a DataFrame to copy out of
+    date_time = pd.to_datetime(
+        table.column("date_time").to_numpy(), format="ISO8601", cache=True
+    ) - pd.Timedelta(hours=1)
+    index = pd.DatetimeIndex(date_time, name="date_time")
+    resstock_series = pd.Series(table.column(temperature_col).to_numpy(), index=index, name=temperature_col)
+    # ResStock weather files are already hourly, so only resample when they are not
+    freq = pd.infer_freq(resstock_series.index)
+    if freq is None or pd.tseries.frequencies.to_offset(freq) != pd.offsets.Hour():
+        resstock_series = resstock_series.resample("h").mean()
     resstock_series = resstock_series.tz_localize("Etc/GMT+4")
+    write_cache("weather_cache", cache_key, pa.Table.from_pandas(resstock_series.reset_index()))
     
     return resstock_series
 
@@ -146,33 +219,62 @@ def get_available_upgrades(upgrades_lookup):
     """Get list of available upgrades from upgrades lookup"""
     return [int(k) for k in upgrades_lookup.keys() if k.isdigit()]
 
+@st.cache_resource
+def get_s3_filesystem():
+    """Get an anonymous filesystem for the public OEDI S3 bucket"""
+    return pafs.S3FileSystem(anonymous=True, region="us-west-2")
+
+@st.cache_data(ttl=3600, max_entries=256)
 def get_loadshape_data(building_id, state, upgrade):
     """Get loadshape data from S3 for a specific building ID, state, and upgrade"""
-    # Construct URL
-    base_url = "https://oedi-data-lake.s3.amazonaws.com/nrel-pds-building-stock/end-use-load-profiles-for-us-building-stock"
+    # Construct S3 path
+    base_path = "oedi-data-lake/nrel-pds-building-stock/end-use-load-profiles-for-us-building-stock"
     suffix = f"2024/resstock_amy2018_release_2/timeseries_individual_buildings/by_state/upgrade={upgrade}/state={state}/{building_id}-{upgrade}.parquet"
-    url = f"{base_url}/{suffix}"
-    
-    # Fetch parquet file
-    response = requests.get(url, timeout=30)
-    response.raise_for_status()
-    
-    # Read parquet from bytes
-    df = pd.read_parquet(BytesIO(response.content))
-    
-    # Convert timestamp to datetime if it exists
-    df = df.set_index(pd.to_datetime(df["timestamp"]))
-    df.index = df.index - pd.Timedelta(minutes=15)
-    df = df.tz_localize("Etc/GMT+4")
+    path = f"{base_path}/{suffix}"
     
     # Find the electricity total energy consumption column
     electricity_col = 'out.electricity.total.energy_consumption'
+    columns = ["timestamp", electricity_col]
+    
+    # Fetch parquet file, keeping a copy on disk for later sessions
+    cache_key = f"{building_id}-{upgrade}"
+    table = read_cache("loadshape_cache", cache_key)
+    if table is None:
+        # Only the column chunks we need are fetched, via ranged S3 reads
+        table = pq.read_table(path, columns=columns, filesystem=get_s3_filesystem())
+        write_cache("loadshape_cache", cache_key, table)
+    
+    # Build the series straight from the two Arrow columns, without a DataFrame
+    index = pd.DatetimeIndex(pd.to_datetime(table.column("timestamp").to_numpy()), name="timestamp")
+    index = (index - pd.Timedelta(minutes=15)).tz_localize("Etc/GMT+4")
+    loadshape = pd.Series(table.column(electricity_col).to_numpy(), index=index, name=electricity_col)
 
-    return df[electricity_col].resample("h").sum()
-    
-def make_prediction(weather_data, loadshape_data, selected_date):
-    baseline_loadshape_data = loadshape_data[(loadshape_data.index.date>=selected_date-timedelta(days=28))&(loadshape_data.index.date<selected_date)]
-    baseline_weather_data = weather_data[(weather_data.index.date>=selected_date-timedelta(days=28))&(weather_data.index.date<selected_date)]
+    return loadshape.resample("h").sum()
+    
+def select_period(series, start, end):
+    """Select the part of a time series from start (inclusive) to end (exclusive)"""
+    # Compare the raw int64 timestamps rather than going through Timestamp comparisons
+    index = series.index
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    # The int64 values are UTC for tz-aware timestamps and wall time for naive ones, so keep
+    # the check that pandas' own comparison does
+    if (start.tz is None) != (index.tz is None) or (end.tz is None) != (index.tz is None):
+        raise TypeError("Cannot compare tz-naive and tz-aware timestamps")
+    values = index.asi8
+    start = start.as_unit(index.unit).asm8.view("i8")
+    end = end.as_unit(index.unit).asm8.view("i8")
+    return series[(values >= start) & (values < end)]
+
+# Streamlit does not hash cached function arguments with a leading underscore. They are only
+# used for data that is fully determined by the other arguments, which form the cache key.
+
+@st.cache_resource(max_entries=64)
+def fit_baseline_model(building_id, upgrade, selected_date, _weather_data, _loadshape_data):
+    """Fit the hourly model on the 28 days before selected_date"""
+    selected_start = pd.Timestamp(selected_date, tz=_loadshape_data.index.tz)
+    baseline_start = selected_start - pd.Timedelta(days=28)
+    baseline_loadshape_data = select_period(_loadshape_data, baseline_start, selected_start)
+    baseline_weather_data = select_period(_weather_data, baseline_start, selected_start)
 
     hourly_baseline_data = HourlyBaselineData.from_series(
         baseline_loadshape_data,
@@ -180,22 +282,349 @@ def make_prediction(weather_data, loadshape_data, selected_date):
         is_electricity_data=True,
     )
 
-    hourly_model = create_and_fit_hourly_model(hourly_baseline_data, "single", include_occupancy=False)
+    return create_and_fit_hourly_model(hourly_baseline_data, "single", include_occupancy=False)
+
+def hour_of_day_stats(series, include_range=True):
+    """Get the mean, and optionally the minimum and maximum, of a time series by hour of day"""
+    # A fixed 24-bin reduction, so bincounts are much cheaper than a groupby
+    hours = series.index.hour.to_numpy()
+    values = series.to_numpy(dtype=np.float64)
+    valid = ~np.isnan(values)
+    valid_hours = hours[valid]
+    valid_values = values[valid]
+    sums = np.bincount(valid_hours, weights=valid_values, minlength=24)
+    counts = np.bincount(valid_hours, minlength=24)
+    present = np.bincount(hours, minlength=24) > 0
+    # Hours that only have missing values get NaN
+    with np.errstate(invalid="ignore"):
+        stats = [sums / counts]
+    if include_range:
+        mins = np.full(24, np.inf)
+        maxs = np.full(24, -np.inf)
+        np.minimum.at(mins, valid_hours, valid_values)
+        np.maximum.at(maxs, valid_hours, valid_values)
+        mins[counts == 0] = np.nan
+        maxs[counts == 0] = np.nan
+        stats += [mins, maxs]
+    # Every hour is present unless the series is shorter than a day, so share the constant
+    hour_labels = HOURS_24 if present.all() else HOURS_24[present]
+    index = pd.Index(hour_labels, copy=False, name=series.index.name)
+    return tuple(pd.Series(stat[present], index=index, name=series.name) for stat in stats)
+
+def hour_of_day_mean(series):
+    """Average a time series by hour of day"""
+    return hour_of_day_stats(series, include_range=False)[0]
+
+@st.cache_data(max_entries=256)
+def get_loadshape_hod_stats(building_id, state, upgrade):
+    """Get the mean, minimum and maximum loadshape by hour of day over all available data"""
+    return hour_of_day_stats(get_loadshape_data(building_id, state, upgrade))
+
+@st.cache_data(max_entries=256)
+def get_period_hourly_averages(building_id, state, upgrade, county_id, selected_date):
+    """Get the baseline loadshape, baseline temperature and selected-day temperature by hour of day"""
+    loadshape_series = get_loadshape_data(building_id, state, upgrade)
+    weather_data = get_weather_data(state, county_id)
+    selected_start = pd.Timestamp(selected_date, tz=loadshape_series.index.tz or 'UTC')
+    baseline_start = selected_start - pd.Timedelta(days=28)
+    selected_end = selected_start + pd.Timedelta(days=1)
+    return (
+        hour_of_day_mean(select_period(loadshape_series, baseline_start, selected_start)),
+        hour_of_day_mean(select_period(weather_data, baseline_start, selected_start)),
+        hour_of_day_mean(select_period(weather_data, selected_start, selected_end)),
+    )
+
+def make_prediction(weather_data, loadshape_data, selected_date, building_id, upgrade):
+    hourly_model = fit_baseline_model(building_id, upgrade, selected_date, weather_data, loadshape_data)
 
+    selected_start = pd.Timestamp(selected_date, tz=loadshape_data.index.tz)
+    selected_end = selected_start + pd.Timedelta(days=1)
     hourly_reporting_data = HourlyReportingData.from_series(
-        loadshape_data[loadshape_data.index.date==selected_date],
-        weather_data[weather_data.index.date==selected_date],
+        select_period(loadshape_data, selected_start, selected_end),
+        select_period(weather_data, selected_start, selected_end),
         is_electricity_data=True,
     )
 
     return hourly_model.predict(reporting_data=hourly_reporting_data)
-        
+
+@st.cache_data(max_entries=256)
+def build_temperature_fig(state, county_id, selected_date, _weather_28_hourly, _weather_selected_hourly):
+    """Build the temperature comparison chart as Plotly JSON"""
+    fig_temp = go.Figure()
+
+    # Add 28-day average first (so it appears behind)
+    fig_temp.add_trace(go.Scatter(
+        x=_weather_28_hourly.index,
+        y=_weather_28_hourly.values,
+        mode='lines+markers',
+        name="28-Day Average",
+        line=dict(width=3, color='#2ca02c', shape='hv'),
+        marker=dict(size=8, color='#2ca02c'),
+        fill='tozeroy',
+        fillcolor='rgba(44, 160, 44, 0.1)'
+    ))
+
+    # Add selected day on top
+    fig_temp.add_trace(go.Scatter(
+        x=_weather_selected_hourly.index,
+        y=_weather_selected_hourly.values,
+        mode='lines+markers',
+        name=f"Selected Day: {selected_date}",
+        line=dict(width=3, color='#ff7f0e', shape='hv'),
+        marker=dict(size=8, color='#ff7f0e')
+    ))
+
+    fig_temp.update_layout(
+        title=f"Temperature Comparison: Selected Day vs 28-Day Average",
+        xaxis_title="Hour of Day",
+        yaxis_title="Temperature (°C)",
+        height=400,
+        showlegend=True,
+        hovermode='x unified',
+        xaxis=dict(
+            tickmode='linear',
+            tick0=0,
+            dtick=1,
+            range=[0, 23]
+        ),
+        template='plotly_white'
+    )
+
+    return fig_temp.to_json()
+
+@st.cache_data(max_entries=256)
+def build_selected_fig(building_id, upgrade, selected_date, _hours, _predicted, _observed):
+    """Build the predicted vs observed chart for the selected day, without the hour highlight, as Plotly JSON"""
+    fig_selected = go.Figure()
+
+    # Add observed values
+    fig_selected.add_trace(go.Scatter(
+        x=_hours,
+        y=_observed.values,
+        mode='lines+markers',
+        name="Observed",
+        line=dict(width=3, color='#1f77b4', shape='hv'),
+        marker=dict(size=8, color='#1f77b4', opacity=0.7),
+        opacity=0.7,
+        fill='tozeroy',
+        fillcolor='rgba(31, 119, 180, 0.1)'
+    ))
+
+    # Add predicted values
+    fig_selected.add_trace(go.Scatter(
+        x=_hours,
+        y=_predicted.values,
+        mode='lines+markers',
+        name="Predicted",
+        line=dict(width=3, color='#ff7f0e', shape='hv'),
+        marker=dict(size=8, color='#ff7f0e', symbol='diamond', opacity=0.7),
+        opacity=0.7
+    ))
+
+    fig_selected.update_layout(
+        title=f"Selected Day: {selected_date} - Predicted vs Observed",
+        xaxis_title="Hour of Day",
+        yaxis_title="Electricity Consumption (kWh)",
+        height=400,
+        showlegend=True,
+        hovermode='x unified',
+        xaxis=dict(
+            tickmode='linear',
+            tick0=0,
+            dtick=1,
+            range=[0, 23]
+        ),
+        template='plotly_white'
+    )
+
+    return fig_selected.to_json()
+
+@st.cache_data(max_entries=256)
+def build_baseline_fig(building_id, upgrade, selected_date, baseline_start_date, _days_28_before_hourly, _hours, _predicted):
+    """Build the baseline vs prediction chart as Plotly JSON"""
+    fig_28days = go.Figure()
+
+    # Add baseline average
+    fig_28days.add_trace(go.Scatter(
+        x=_days_28_before_hourly.index,
+        y=_days_28_before_hourly.values,
+        mode='lines+markers',
+        name="Baseline (28-day avg)",
+        line=dict(width=3, color='#2ca02c', shape='hv'),
+        marker=dict(size=8, color='#2ca02c'),
+        fill='tozeroy',
+        fillcolor='rgba(44, 160, 44, 0.1)'
+    ))
+
+    # Add predicted line for comparison
+    if not _predicted.empty:
+        fig_28days.add_trace(go.Scatter(
+            x=_hours,
+            y=_predicted.values,
+            mode='lines+markers',
+            name="Predicted (selected day)",
+            line=dict(width=3, color='#ff7f0e', shape='hv'),
+            marker=dict(size=8, color='#ff7f0e', symbol='diamond', opacity=0.7),
+            opacity=0.7
+        ))
+
+    fig_28days.update_layout(
+        title=f"Baseline vs Prediction: {baseline_start_date} to {selected_date}",
+        xaxis_title="Hour of Day",
+        yaxis_title="Electricity Consumption (kWh)",
+        height=400,
+        showlegend=True,
+        hovermode='x unified',
+        xaxis=dict(
+            tickmode='linear',
+            tick0=0,
+            dtick=1,
+            range=[0, 23]
+        ),
+        template='plotly_white'
+    )
+
+    return fig_28days.to_json()
+
+@st.cache_data(max_entries=256)
+def build_average_fig(building_id, state, upgrade):
+    """Build the average loadshape chart with its hourly min/max band as Plotly JSON"""
+    hod_mean, hod_min, hod_max = get_loadshape_hod_stats(building_id, state, upgrade)
+    hours = hod_mean.index.to_numpy()
+    # float32 is plenty for display and halves the chart data sent to the browser
+    hod_min_values = hod_min.to_numpy(dtype=np.float32)
+    hod_max_values = hod_max.to_numpy(dtype=np.float32)
+
+    fig_avg = go.Figure()
+
+    # Add the min/max range for each hour as a shaded band behind the average; the band
+    # edges are left out of the hover, which shows min and max on the average instead
+    fig_avg.add_trace(go.Scatter(
+        x=hours,
+        y=hod_max_values,
+        mode='lines',
+        name="Maximum",
+        line=dict(width=0, shape='hv'),
+        legendgroup="range",
+        showlegend=False,
+        hoverinfo='skip'
+    ))
+    fig_avg.add_trace(go.Scatter(
+        x=hours,
+        y=hod_min_values,
+        mode='lines',
+        name="Min/Max Range",
+        line=dict(width=0, shape='hv'),
+        fill='tonexty',
+        fillcolor='rgba(31, 119, 180, 0.25)',
+        legendgroup="range",
+        hoverinfo='skip'
+    ))
+
+    fig_avg.add_trace(go.Scatter(
+        x=hours,
+        y=hod_mean.to_numpy(dtype=np.float32),
+        customdata=np.column_stack([hod_min_values, hod_max_values]),
+        mode='lines+markers',
+        name="Average Electricity Consumption",
+        line=dict(width=3, color='#1f77b4', shape='hv'),
+        marker=dict(size=8, color='#1f77b4'),
+        hovertemplate=(
+            "Average: %{y:.3f} kWh<br>"
+            "Min: %{customdata[0]:.3f} kWh<br>"
+            "Max: %{customdata[1]:.3f} kWh<extra></extra>"
+        )
+    ))
+
+    # Update layout
+    fig_avg.update_layout(
+        title="24-Hour Average Electricity Loadshape (All Available Data)",
+        xaxis_title="Hour of Day",
+        yaxis_title="Electricity Consumption (kWh)",
+        height=500,
+        showlegend=True,
+        hovermode='x unified',
+        xaxis=dict(
+            tickmode='linear',
+            tick0=0,
+            dtick=1,
+            range=[0, 23]
+        ),
+        template='plotly_white'
+    )
+
+    return fig_avg.to_json()
+
+@st.cache_data(max_entries=256)
+def build_raw_data_tables(building_id, upgrade, selected_date, _hod_hours, _hod_values, _obs_hours, _observed, _predicted, _difference, _days_28_before_hourly):
+    """Build the average, selected day and 28-day baseline display tables, or None where there is no data"""
+    display_df = pa.table({
+        'Hour': pa.array(_hod_hours),
+        'Electricity Consumption (kWh)': pa.array(np.round(_hod_values, 3), type=pa.float32())
+    })
+
+    display_df_selected = None
+    if not _observed.empty and not _predicted.empty:
+        display_df_selected = pa.table({
+            'Hour': pa.array(_obs_hours),
+            'Observed (kWh)': pa.array(np.round(_observed.to_numpy(), 3), type=pa.float32()),
+            'Predicted (kWh)': pa.array(np.round(_predicted.to_numpy(), 3), type=pa.float32()),
+            'Difference (kWh)': pa.array(np.round(_difference, 3), type=pa.float32())
+        })
+
+    display_df_28days = None
+    if not _days_28_before_hourly.empty:
+        display_df_28days = pa.table({
+            'Hour': pa.array(_days_28_before_hourly.index.to_numpy()),
+            'Electricity Consumption (kWh)': pa.array(np.round(_days_28_before_hourly.to_numpy(), 3), type=pa.float32())
+        })
+
+    return display_df, display_df_selected, display_df_28days
+
+@st.fragment
+def show_raw_data(building_id, upgrade, selected_date, hod_hours, hod_values, obs_hours, observed, predicted, difference, days_28_before_hourly):
+    """Show the raw data tables behind a checkbox"""
+    # Only build and send the tables when asked for; the checkbox state persists across reruns
+    if st.checkbox("📋 View Raw Data", key="show_raw"):
+        display_df, display_df_selected, display_df_28days = build_raw_data_tables(
+            building_id, upgrade, selected_date,
+            hod_hours, hod_values, obs_hours, observed, predicted, difference, days_28_before_hourly
+        )
+
+        tab1, tab2, tab3 = st.tabs(["Average (All Data)", "Selected Day", "28 Days Before"])
+
+        with tab1:
+            st.table(display_df)
+
+        with tab2:
+            if display_df_selected is not None:
+                st.table(display_df_selected)
+            else:
+                st.info(f"No data available for {selected_date}")
+
+        with tab3:
+            if display_df_28days is not None:
+                st.table(display_df_28days)
+            else:
+                st.info(f"No data available for the 28 days before {selected_date}")
+
+@st.cache_data(max_entries=256)
+def build_selection_details(building_id, state, upgrade, building_type):
+    """Build the selection details markdown, sent as one element instead of one per line"""
+    upgrade_name = load_upgrades_lookup()[str(upgrade)]
+    return "\n".join([
+        "**Selection Details:**",
+        f"- **Building ID:** {building_id}",
+        f"- **State:** {state}",
+        f"- **Upgrade:** {upgrade} - {upgrade_name}",
+        f"- **Building Type:** {building_type}",
+    ])
+
 
 def main():
     # Check if database exists
     try:
-        conn = sqlite3.connect(db_path)
-        conn.close()
+        get_db_connection()
     except Exception as e:
         st.error(f"❌ Database Error: {e}")
         st.error("❌ SQLite database not found! Please run `python convert_to_sqlite.py` first.")
@@ -208,8 +637,7 @@ def main():
         st.stop()
     
     # Get available options
-    available_states = get_available_states()
-    available_building_types = get_available_building_types()
+    available_states, available_building_types = get_lookup_dimensions()
     available_upgrades = get_available_upgrades(upgrades_lookup)
     
     if not available_states or not available_building_types:
@@ -296,53 +724,49 @@ def main():
             st.query_params.clear()
             st.rerun()
     
-    # Initialize session state for building ID and loadshape data
-    if 'current_building_id' not in st.session_state:
-        st.session_state.current_building_id = None
-    if 'loadshape_series' not in st.session_state:
-        st.session_state.loadshape_series = None
-    if 'loadshape_hod_data' not in st.session_state:
-        st.session_state.loadshape_hod_data = None
-    
-    # Get building ID - use URL param if available, otherwise get random
-    random_bldg_id = url_building_id or get_random_building_id(selected_state, selected_building_type)
-    selected_state, selected_building_type, county_id = get_building_info(random_bldg_id)
+    # Get building ID - use URL param if available (already looked up above), otherwise get random
+    if url_building_id:
+        random_bldg_id = url_building_id
+        selected_state, selected_building_type = url_state, url_building_type
+    else:
+        random_bldg_id = get_random_building_id(selected_state, selected_building_type)
+        selected_state, selected_building_type, county_id = get_building_info(random_bldg_id)
     
     if not random_bldg_id:
         st.warning(f"⚠️ No buildings found for {selected_state} - {selected_building_type}")
         st.info("Try selecting different state or building type.")
         return
     
-    # Check if we need to fetch new data
-    # Create a cache key based on building ID, state, and upgrade
-    cache_key = f"{random_bldg_id}_{selected_state}_{selected_upgrade}"
+    # Fetch weather data in the background while the loadshape is fetched below, unless an
+    # earlier run already has it in memory
+    weather_key = (selected_state, county_id)
+    weather_future = None
+    if weather_key not in get_fetched_weather_keys():
+        weather_executor = ThreadPoolExecutor(
+            max_workers=1, initializer=add_script_run_ctx, initargs=(None, get_script_run_ctx())
+        )
+        weather_future = weather_executor.submit(get_weather_data, selected_state, county_id)
+        weather_executor.shutdown(wait=False)
+    
+    # Fetch loadshape data (memoized across sessions by st.cache_data)
+    with st.spinner(f"Fetching loadshape data for building {random_bldg_id}..."):
+        loadshape_series = get_loadshape_data(random_bldg_id, selected_state, selected_upgrade)
+    
+    if loadshape_series is None or len(loadshape_series) == 0:
+        st.warning("⚠️ No loadshape data available for the selected combination.")
+        st.info("Try selecting different state, upgrade, or building type.")
+        return
+    
+    loadshape_hod_data = get_loadshape_hod_stats(random_bldg_id, selected_state, selected_upgrade)[0]
+    # Bind the arrays once for the metrics, chart and raw data table
+    hod_hours = loadshape_hod_data.index.to_numpy()
+    hod_values = loadshape_hod_data.to_numpy()
 
-    # Check if we have cached data for this exact combination
-    if ('loadshape_cache_key' not in st.session_state or 
-        st.session_state.loadshape_cache_key != cache_key or
-        st.session_state.loadshape_series is None):
-        
-        # Fetch new data
-        with st.spinner(f"Fetching loadshape data for building {random_bldg_id}..."):
-            loadshape_series = get_loadshape_data(random_bldg_id, selected_state, selected_upgrade)
-            
-            if loadshape_series is None or len(loadshape_series) == 0:
-                st.warning("⚠️ No loadshape data available for the selected combination.")
-                st.info("Try selecting different state, upgrade, or building type.")
-                return
-            
-            loadshape_hod_data = loadshape_series.groupby(loadshape_series.index.hour).mean()
-            
-            # Store in session state
-            st.session_state.loadshape_cache_key = cache_key
-            st.session_state.loadshape_series = loadshape_series
-            st.session_state.loadshape_hod_data = loadshape_hod_data
+    if weather_future is not None:
+        with st.spinner(f"Fetching weather data for {county_id}, {selected_state}..."):
+            weather_data = weather_future.result()
+        get_fetched_weather_keys().add(weather_key)
     else:
-        # Use cached data from session state
-        loadshape_series = st.session_state.loadshape_series
-        loadshape_hod_data = st.session_state.loadshape_hod_data
-
-    with st.spinner(f"Fetching weather data for {county_id}, {selected_state}..."):
         weather_data = get_weather_data(selected_state, county_id)
 
     
@@ -420,7 +844,7 @@ def main():
 
     # Make Prediction
     with st.spinner(f"Making prediction for {selected_date}..."):
-        prediction = make_prediction(weather_data, loadshape_series, selected_date)
+        prediction = make_prediction(weather_data, loadshape_series, selected_date, random_bldg_id, selected_upgrade)
     
     # Convert selected_date to datetime for filtering
     # Get timezone from the series or use UTC
@@ -431,26 +855,23 @@ def main():
     
     # Filter data for 28 days before selected day
     days_28_before_start = selected_datetime_start - pd.Timedelta(days=28)
-    days_28_before_data = loadshape_series[
-        (loadshape_series.index >= days_28_before_start) & 
-        (loadshape_series.index < selected_datetime_start)
-    ]
+    days_28_before_data = select_period(loadshape_series, days_28_before_start, selected_datetime_start)
     
     
     # Display metrics
     metric_col1, metric_col2, metric_col3, metric_col4 = st.columns(4)
     
     with metric_col1:
-        st.metric("Total (24h)", f"{loadshape_hod_data.sum():,.2f} kWh")
+        st.metric("Total (24h)", f"{hod_values.sum():,.2f} kWh")
     
     with metric_col2:
-        st.metric("Average (per hour)", f"{loadshape_hod_data.mean():,.2f} kWh")
+        st.metric("Average (per hour)", f"{hod_values.mean():,.2f} kWh")
     
     with metric_col3:
-        st.metric("Peak Hour", f"Hour {loadshape_hod_data.idxmax()}")
+        st.metric("Peak Hour", f"Hour {hod_hours[hod_values.argmax()]}")
     
     with metric_col4:
-        st.metric("Peak Value", f"{loadshape_hod_data.max():,.2f} kWh")
+        st.metric("Peak Value", f"{hod_values.max():,.2f} kWh")
     
     # Calculate savings for selected hour range (after prediction is made)
     # This will be calculated later when we have predicted and observed
@@ -459,61 +880,25 @@ def main():
     st.subheader("📊 Daily Loadshape Charts")
     
     # Filter weather data for 28 days before
-    weather_28_days = weather_data[
-        (weather_data.index >= days_28_before_start) & 
-        (weather_data.index < selected_datetime_start)
-    ]
+    weather_28_days = select_period(weather_data, days_28_before_start, selected_datetime_start)
         
     # Temperature chart - combined
     st.subheader("🌡️ Temperature Data")
     
     # Temperature for selected day
-    weather_selected_day = weather_data[weather_data.index.date == selected_date]
-    weather_selected_hourly = weather_selected_day.groupby(weather_selected_day.index.hour).mean()
-    
-    # Temperature for 28 days before (average)
-    weather_28_hourly = weather_28_days.groupby(weather_28_days.index.hour).mean()
-    
-    fig_temp = go.Figure()
-    
-    # Add 28-day average first (so it appears behind)
-    fig_temp.add_trace(go.Scatter(
-        x=weather_28_hourly.index,
-        y=weather_28_hourly.values,
-        mode='lines+markers',
-        name="28-Day Average",
-        line=dict(width=3, color='#2ca02c', shape='hv'),
-        marker=dict(size=8, color='#2ca02c'),
-        fill='tozeroy',
-        fillcolor='rgba(44, 160, 44, 0.1)'
-    ))
-    
-    # Add selected day on top
-    fig_temp.add_trace(go.Scatter(
-        x=weather_selected_hourly.index,
-        y=weather_selected_hourly.values,
-        mode='lines+markers',
-        name=f"Selected Day: {selected_date}",
-        line=dict(width=3, color='#ff7f0e', shape='hv'),
-        marker=dict(size=8, color='#ff7f0e')
-    ))
+    weather_selected_day = select_period(
+        weather_data, selected_datetime_start, selected_datetime_start + pd.Timedelta(days=1)
+    )
     
-    fig_temp.update_layout(
-        title=f"Temperature Comparison: Selected Day vs 28-Day Average",
-        xaxis_title="Hour of Day",
-        yaxis_title="Temperature (°C)",
-        height=400,
-        showlegend=True,
-        hovermode='x unified',
-        xaxis=dict(
-            tickmode='linear',
-            tick0=0,
-            dtick=1,
-            range=[0, 23]
-        ),
-        template='plotly_white'
+    # Hour of day averages for the selected day and the 28 days before
+    days_28_before_hourly, weather_28_hourly, weather_selected_hourly = get_period_hourly_averages(
+        random_bldg_id, selected_state, selected_upgrade, county_id, selected_date
     )
     
+    fig_temp = go.Figure(json.loads(build_temperature_fig(
+        selected_state, county_id, selected_date, weather_28_hourly, weather_selected_hourly
+    )))
+    
     st.plotly_chart(fig_temp, use_container_width=True)
         
     chart_col1, chart_col2 = st.columns(2)
@@ -523,22 +908,18 @@ def main():
         predicted = prediction.predicted
         observed = prediction.observed
         
-        # Calculate savings for selected hour range
-        # Get hours from the index
-        if hasattr(predicted.index, 'hour'):
-            pred_hours = predicted.index.hour
-            obs_hours = observed.index.hour if hasattr(observed.index, 'hour') else [i % 24 for i in range(len(observed))]
-        else:
-            pred_hours = [i % 24 for i in range(len(predicted))]
-            obs_hours = [i % 24 for i in range(len(observed))]
+        # Observed minus predicted for each hour, shared by the accuracy metrics and raw data table
+        observed_values = observed.to_numpy()
+        predicted_values = predicted.to_numpy()
+        difference = np.subtract(observed_values, predicted_values)
         
-        # Filter to selected hour range and calculate savings
-        pred_hour_series = pd.Series(pred_hours, index=predicted.index)
-        obs_hour_series = pd.Series(obs_hours, index=observed.index)
+        # Hour of day for each row, shared by the savings mask, the chart and the raw data table
+        obs_hours = observed.index.hour.to_numpy(dtype=np.int8)
         
-        # Get data for selected hours
-        selected_pred = predicted[(pred_hour_series >= start_hour) & (pred_hour_series < end_hour)]
-        selected_obs = observed[(obs_hour_series >= start_hour) & (obs_hour_series < end_hour)]
+        # Calculate savings for selected hour range
+        hour_mask = (obs_hours >= start_hour) & (obs_hours < end_hour)
+        selected_pred = predicted[hour_mask]
+        selected_obs = observed[hour_mask]
         
         # Calculate savings (predicted - observed)
         if len(selected_pred) > 0 and len(selected_obs) > 0:
@@ -556,10 +937,10 @@ def main():
         else:
             savings = 0.0
         
-        # Get hour of day for x-axis
-        hours = pred_hours
-        
-        fig_selected = go.Figure()
+        # Reuse the cached figure and only add the highlight for the selected hour range
+        fig_selected = go.Figure(json.loads(build_selected_fig(
+            random_bldg_id, selected_upgrade, selected_date, obs_hours, predicted, observed
+        )))
         
         # Add vertical rectangle for hour range if range is selected
         # Use yref="paper" to make it span the full y-axis height
@@ -577,46 +958,6 @@ def main():
                 layer="below"
             )
         
-        # Add observed values
-        fig_selected.add_trace(go.Scatter(
-            x=hours,
-            y=observed.values,
-            mode='lines+markers',
-            name="Observed",
-            line=dict(width=3, color='#1f77b4', shape='hv'),
-            marker=dict(size=8, color='#1f77b4', opacity=0.7),
-            opacity=0.7,
-            fill='tozeroy',
-            fillcolor='rgba(31, 119, 180, 0.1)'
-        ))
-        
-        # Add predicted values
-        fig_selected.add_trace(go.Scatter(
-            x=hours,
-            y=predicted.values,
-            mode='lines+markers',
-            name="Predicted",
-            line=dict(width=3, color='#ff7f0e', shape='hv'),
-            marker=dict(size=8, color='#ff7f0e', symbol='diamond', opacity=0.7),
-            opacity=0.7
-        ))
-        
-        fig_selected.update_layout(
-            title=f"Selected Day: {selected_date} - Predicted vs Observed",
-            xaxis_title="Hour of Day",
-            yaxis_title="Electricity Consumption (kWh)",
-            height=400,
-            showlegend=True,
-            hovermode='x unified',
-            xaxis=dict(
-                tickmode='linear',
-                tick0=0,
-                dtick=1,
-                range=[0, 23]
-            ),
-            template='plotly_white'
-        )
-        
         st.plotly_chart(fig_selected, use_container_width=True)
         
         # Display selected hour range info and prediction accuracy
@@ -631,60 +972,25 @@ def main():
         )
         
         # Calculate and display prediction metrics
-        if len(predicted) > 0 and len(observed) > 0:
-            mape = (abs(predicted.values - observed.values) / observed.values * 100).mean()
-            rmse = ((predicted.values - observed.values) ** 2).mean() ** 0.5
-            st.metric("Mean Absolute Percentage Error (MAPE)", f"{mape:.2f}%")
+        if not predicted.empty and not observed.empty:
+            rmse = np.sqrt(np.mean(difference * difference))
+            
+            # Percentage error is undefined for hours with zero observed usage
+            nonzero = observed_values != 0
+            if nonzero.any():
+                mape = np.mean(np.abs(difference[nonzero]) / observed_values[nonzero]) * 100
+                st.metric("Mean Absolute Percentage Error (MAPE)", f"{mape:.2f}%")
+            else:
+                st.metric("Mean Absolute Percentage Error (MAPE)", "N/A")
             st.metric("Root Mean Square Error (RMSE)", f"{rmse:.2f} kWh")
     
     with chart_col2:
         # Chart for 28 days before - show baseline used for prediction
-        if len(days_28_before_data) > 0:
-            # Group by hour and calculate average across all 28 days
-            days_28_before_hourly = days_28_before_data.groupby(days_28_before_data.index.hour).mean()
-            
-            fig_28days = go.Figure()
-            
-            # Add baseline average
-            fig_28days.add_trace(go.Scatter(
-                x=days_28_before_hourly.index,
-                y=days_28_before_hourly.values,
-                mode='lines+markers',
-                name="Baseline (28-day avg)",
-                line=dict(width=3, color='#2ca02c', shape='hv'),
-                marker=dict(size=8, color='#2ca02c'),
-                fill='tozeroy',
-                fillcolor='rgba(44, 160, 44, 0.1)'
-            ))
-            
-            # Add predicted line for comparison
-            if len(predicted) > 0:
-                pred_hours = predicted.index.hour if hasattr(predicted.index, 'hour') else range(len(predicted))
-                fig_28days.add_trace(go.Scatter(
-                    x=pred_hours,
-                    y=predicted.values,
-                    mode='lines+markers',
-                    name="Predicted (selected day)",
-                    line=dict(width=3, color='#ff7f0e', shape='hv'),
-                    marker=dict(size=8, color='#ff7f0e', symbol='diamond', opacity=0.7),
-                    opacity=0.7
-                ))
-            
-            fig_28days.update_layout(
-                title=f"Baseline vs Prediction: {days_28_before_start.date()} to {selected_date}",
-                xaxis_title="Hour of Day",
-                yaxis_title="Electricity Consumption (kWh)",
-                height=400,
-                showlegend=True,
-                hovermode='x unified',
-                xaxis=dict(
-                    tickmode='linear',
-                    tick0=0,
-                    dtick=1,
-                    range=[0, 23]
-                ),
-                template='plotly_white'
-            )
+        if not days_28_before_data.empty:
+            fig_28days = go.Figure(json.loads(build_baseline_fig(
+                random_bldg_id, selected_upgrade, selected_date, days_28_before_start.date(),
+                days_28_before_hourly, obs_hours, predicted
+            )))
             
             st.plotly_chart(fig_28days, use_container_width=True)
         else:
@@ -726,9 +1032,10 @@ def main():
     
     fig_temp_energy = go.Figure()
     
+    # Markers are drawn with WebGL; both traces use it so the prediction day stays on top
     # Add baseline scatter (28 days)
     if len(baseline_aligned) > 0:
-        fig_temp_energy.add_trace(go.Scatter(
+        fig_temp_energy.add_trace(go.Scattergl(
             x=baseline_aligned['temperature'],
             y=baseline_aligned['energy'],
             mode='markers',
@@ -743,7 +1050,7 @@ def main():
     
     # Add prediction day scatter
     if len(prediction_day_aligned) > 0:
-        fig_temp_energy.add_trace(go.Scatter(
+        fig_temp_energy.add_trace(go.Scattergl(
             x=prediction_day_aligned['temperature'],
             y=prediction_day_aligned['energy'],
             mode='markers',
@@ -770,72 +1077,15 @@ def main():
     
     # Also show the average loadshape chart
     st.subheader("📊 Average Loadshape (All Data)")
-    fig_avg = go.Figure()
-    
-    fig_avg.add_trace(go.Scatter(
-        x=loadshape_hod_data.index,
-        y=loadshape_hod_data.values,
-        mode='lines+markers',
-        name="Average Electricity Consumption",
-        line=dict(width=3, color='#1f77b4', shape='hv'),
-        marker=dict(size=8, color='#1f77b4'),
-        fill='tozeroy',
-        fillcolor='rgba(31, 119, 180, 0.1)'
-    ))
-    
-    # Update layout
-    fig_avg.update_layout(
-        title="24-Hour Average Electricity Loadshape (All Available Data)",
-        xaxis_title="Hour of Day",
-        yaxis_title="Electricity Consumption (kWh)",
-        height=500,
-        showlegend=True,
-        hovermode='x unified',
-        xaxis=dict(
-            tickmode='linear',
-            tick0=0,
-            dtick=1,
-            range=[0, 23]
-        ),
-        template='plotly_white'
-    )
+    fig_avg = go.Figure(json.loads(build_average_fig(random_bldg_id, selected_state, selected_upgrade)))
     
     st.plotly_chart(fig_avg, use_container_width=True)
     
     # Display data tables
-    with st.expander("📋 View Raw Data"):
-        tab1, tab2, tab3 = st.tabs(["Average (All Data)", "Selected Day", "28 Days Before"])
-        
-        with tab1:
-            display_df = pd.DataFrame({
-                'Hour': loadshape_hod_data.index,
-                'Electricity Consumption (kWh)': loadshape_hod_data.values
-            })
-            st.dataframe(display_df, use_container_width=True)
-        
-        with tab2:
-            if len(observed) > 0 and len(predicted) > 0:
-                obs_hours = observed.index.hour if hasattr(observed.index, 'hour') else range(len(observed))
-                display_df_selected = pd.DataFrame({
-                    'Hour': obs_hours,
-                    'Observed (kWh)': observed.values,
-                    'Predicted (kWh)': predicted.values,
-                    'Difference (kWh)': (observed.values - predicted.values)
-                })
-                st.dataframe(display_df_selected, use_container_width=True)
-            else:
-                st.info(f"No data available for {selected_date}")
-        
-        with tab3:
-            if len(days_28_before_data) > 0:
-                days_28_before_hourly = days_28_before_data.groupby(days_28_before_data.index.hour).mean()
-                display_df_28days = pd.DataFrame({
-                    'Hour': days_28_before_hourly.index,
-                    'Electricity Consumption (kWh)': days_28_before_hourly.values
-                })
-                st.dataframe(display_df_28days, use_container_width=True)
-            else:
-                st.info(f"No data available for the 28 days before {selected_date}")
+    show_raw_data(
+        random_bldg_id, selected_upgrade, selected_date,
+        hod_hours, hod_values, obs_hours, observed, predicted, difference, days_28_before_hourly
+    )
     
     # Information section
     st.divider()
@@ -844,18 +1094,12 @@ def main():
     info_col1, info_col2 = st.columns(2)
     
     with info_col1:
-        st.write("**Selection Details:**")
-        st.write(f"- **Building ID:** {random_bldg_id}")
-        st.write(f"- **State:** {selected_state}")
-        st.write(f"- **Upgrade:** {selected_upgrade} - {upgrades_lookup[str(selected_upgrade)]}")
-        st.write(f"- **Building Type:** {selected_building_type}")
+        st.markdown(build_selection_details(
+            random_bldg_id, selected_state, selected_upgrade, selected_building_type
+        ))
     
     with info_col2:
-        st.write("**Data Source:**")
-        st.write("- NREL ResStock 2018 Release 1.1")
-        st.write("- Individual building loadshapes")
-        st.write("- Fetched from S3 parquet files")
-        st.write("- Total electricity consumption")
+        st.markdown(DATA_SOURCE_MD)
 
 if __name__ == "__main__":
     main()